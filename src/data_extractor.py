@@ -11,6 +11,7 @@ from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.pdfpage import PDFPage
 from pdfminer.pdfparser import PDFParser
+from sentence_utils import extract_year_from_filename
 
 logger = logging.getLogger(__name__)
 
@@ -75,18 +76,17 @@ class DataExtractor:
         finally:
             output_string.close()
     
-    def _extract_year_from_filename(self, filename: str) -> int:
-        """Extract year from filename or use current year if not found."""
-        try:
-            # Try to find year in filename
-            year_match = re.search(r'20\d{2}', filename)
-            if year_match:
-                return int(year_match.group())
-        except:
-            pass
-        
-        # Default to current year if no year found
-        return datetime.now().year
+    def _extract_year_from_text(self, text: str) -> Optional[int]:
+        """Extract the fiscal year from the 10-K cover page, if present."""
+        # The cover page states e.g. "For the fiscal year ended September 28, 2019"
+        year_match = re.search(
+            r'fiscal\s+year\s+ended\s+[A-Za-z]+\s+\d{1,2}\s*,\s*((?:19|20)\d{2})',
+            text[:20000],
+            re.IGNORECASE
+        )
+        if year_match:
+            return int(year_match.group(1))
+        return None
     
     def extract_data(self, pdf_dir: str, output_dir: str = 'data') -> None:
         """Extract text from PDFs and save each to a separate text file."""
@@ -110,8 +110,15 @@ class DataExtractor:
                     logger.warning(f"Could not extract text from {pdf_file}")
                     continue
                 
-                # Extract year from filename
-                year = self._extract_year_from_filename(pdf_file)
+                # Extract fiscal year from the filing, falling back to the filename
+                year = self._extract_year_from_text(text)
+                if year is None:
+                    logger.warning(f"Could not find fiscal year in {pdf_file}, using filename")
+                    year = extract_year_from_filename(pdf_file)
+                if year is None:
+                    # Default to current year if no year found
+                    logger.warning(f"Could not find year in {pdf_file} filename, using current year")
+                    year = datetime.now().year
                 
                 # Create output filename
                 base_name = os.path.splitext(pdf_file)[0]
@@ -5,8 +5,10 @@ import sys
 from datetime import datetime
 import os
 from risk_extractor import RiskExtractor
+from risk_differ import RiskDiffer
 from word_analyzer import WordAnalyzer
 from sentence_analyzer import SentenceAnalyzer
+from theme_clusterer import ThemeClusterer
 from report_generator import ReportGenerator
 
 def setup_logging():
@@ -53,19 +55,29 @@ def main():
         risk_factors_dir = os.path.join(args.output, 'risk_factors')
         risk_extractor.extract_risks(extracted_texts_dir, risk_factors_dir)
         
-        # Step 3: Analyze word frequencies and sentiment
-        logger.info("Step 3: Analyzing word frequencies and sentiment using VADER")
-        word_analyzer = WordAnalyzer()
+        # Step 3: Diff risk factors against the previous year's filing
+        logger.info("Step 3: Diffing risk factors year over year")
+        risk_differ = RiskDiffer()
         analysis_dir = os.path.join(args.output, 'analysis')
+        risk_differ.diff_risks(risk_factors_dir, analysis_dir)
+        
+        # Step 4: Analyze word frequencies and sentiment
+        logger.info("Step 4: Analyzing word frequencies and sentiment using VADER")
+        word_analyzer = WordAnalyzer()
         word_analyzer.analyze_word_frequencies(risk_factors_dir, analysis_dir)
         
-        # Step 4: Analyze sentences using FinBERT
-        logger.info("Step 4: Analyzing sentences using FinBERT")
+        # Step 5: Analyze sentences using FinBERT
+        logger.info("Step 5: Analyzing sentences using FinBERT")
         sentence_analyzer = SentenceAnalyzer()
         sentence_analyzer.analyze_sentences(risk_factors_dir, analysis_dir)
         
-        # Step 5: Generate report
-        logger.info("Step 5: Generating analysis report")
+        # Step 6: Cluster risk sentences into themes
+        logger.info("Step 6: Clustering risk sentences into themes using sentence embeddings")
+        theme_clusterer = ThemeClusterer()
+        theme_clusterer.cluster_themes(analysis_dir)
+        
+        # Step 7: Generate report
+        logger.info("Step 7: Generating analysis report")
         report_generator = ReportGenerator()
         report_generator.generate_report(analysis_dir, args.output)
         
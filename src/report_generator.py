@@ -1,6 +1,8 @@
 import os
 import logging
+import re
 import pandas as pd
+from sentence_utils import hash_sentence
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,8 +14,8 @@ class ReportGenerator:
         logger.info("Initializing ReportGenerator...")
     
     def _clean_filename(self, filename: str) -> str:
-        """Remove .txt and _2025 suffix from filenames."""
-        return filename.replace('_2025.txt', '').replace('.txt', '')
+        """Remove .txt and _<year> suffix from filenames."""
+        return re.sub(r'(_\d{4})?\.txt$', '', filename)
     
     def generate_report(self, analysis_dir: str, output_dir: str) -> None:
         """Generate a markdown report summarizing the analysis results."""
@@ -29,10 +31,12 @@ class ReportGenerator:
             report.append(f"\nGenerated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             
             report.append("## Overview")
-            report.append("\nThis report analyzes risk factors from financial documents using three different approaches:")
+            report.append("\nThis report analyzes risk factors from financial documents using five different approaches:")
             report.append("1. Word frequency analysis to identify commonly used terms")
             report.append("2. Sentiment analysis of individual words using VADER")
-            report.append("3. Sentence-level sentiment analysis using FinBERT\n")
+            report.append("3. Sentence-level sentiment analysis using FinBERT")
+            report.append("4. Year-over-year diff of risk sections to find added, removed and reworded sentences")
+            report.append("5. Risk theme clustering using sentence embeddings\n")
             
             # Add word frequency analysis section if available
             word_freq_path = os.path.join(analysis_dir, 'word_frequencies_summary.csv')
@@ -79,6 +83,56 @@ class ReportGenerator:
                 except Exception as e:
                     logger.error(f"Error processing sentence sentiment data: {str(e)}")
             
+            # Add year-over-year changes section if available
+            diff_summary_path = os.path.join(analysis_dir, 'risk_diff_summary.csv')
+            if os.path.exists(diff_summary_path):
+                try:
+                    diff_summary = pd.read_csv(diff_summary_path, keep_default_na=False)
+                    diff_summary = diff_summary[diff_summary['previous_file'] != '']
+                    if not diff_summary.empty:
+                        report.append("## Year-over-Year Risk Changes")
+                        report.append("\nEach filing's risk section was aligned with the previous year's. The most negative added and reworded sentences, as scored by FinBERT, are listed for each year.\n")
+                        
+                        sentence_scores = None
+                        if os.path.exists(sentence_sentiment_path):
+                            sentence_scores = pd.read_csv(sentence_sentiment_path)[['label', 'score', 'sentence']]
+                            # Scores are stored once per normalized wording, so match on its hash
+                            sentence_scores['sentence_hash'] = sentence_scores['sentence'].astype(str).map(hash_sentence)
+                            sentence_scores = sentence_scores.drop(columns='sentence')
+                        
+                        for _, row in diff_summary.iterrows():
+                            report.append(f"### {row['year']} vs {row['previous_year']}\n")
+                            report.append(f"- Added: {row['added']}, Reworded: {row['reworded']}, Removed: {row['removed']}, Unchanged: {row['unchanged']}\n")
+                            
+                            diff_path = os.path.join(analysis_dir, f"diff_{row['file'].replace('.txt', '.csv')}")
+                            if sentence_scores is None or not os.path.exists(diff_path):
+                                continue
+                            diff_df = pd.read_csv(diff_path, keep_default_na=False)
+                            changed = diff_df[diff_df['status'].isin(['added', 'reworded'])].copy()
+                            changed['sentence_hash'] = changed['sentence'].map(hash_sentence)
+                            changed = changed.merge(sentence_scores, on='sentence_hash')
+                            changed = changed[(changed['label'] == 'negative') & (changed['score'] > 0.5)]
+                            for _, change in changed.sort_values('score', ascending=False).head(3).iterrows():
+                                report.append(f"- **{change['status'].capitalize()}, Score: {change['score']:.3f}** - {change['sentence']}\n")
+                except Exception as e:
+                    logger.error(f"Error processing risk diff data: {str(e)}")
+            
+            # Add risk themes section if available
+            risk_themes_path = os.path.join(analysis_dir, 'risk_themes.csv')
+            if os.path.exists(risk_themes_path):
+                try:
+                    risk_themes = pd.read_csv(risk_themes_path, keep_default_na=False)
+                    if not risk_themes.empty:
+                        report.append("## Risk Theme Analysis")
+                        report.append("\nRisk sentences were grouped into themes by clustering their sentence embeddings. Each theme shows how many sentences it contains, their average FinBERT negativity (non-negative sentences count as 0), and the sentences closest to the theme's center.\n")
+                        for _, row in risk_themes.iterrows():
+                            report.append(f"### Theme {row['theme']} ({row['size']} sentences, Average Negativity: {row['avg_negativity']:.3f})\n")
+                            for example in str(row['examples']).split(' || '):
+                                if example:
+                                    report.append(f"- {example}\n")
+                except Exception as e:
+                    logger.error(f"Error processing risk themes data: {str(e)}")
+            
             # Write the report to file
             output_path = os.path.join(output_dir, 'output.md')
             with open(output_path, 'w', encoding='utf-8') as f:
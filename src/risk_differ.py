@@ -0,0 +1,155 @@
+import os
+import logging
+from difflib import SequenceMatcher
+from typing import List
+import pandas as pd
+from tqdm import tqdm
+import nltk
+from sentence_utils import split_sentences, hash_sentence, extract_year_from_filename, list_risk_files
+
+logger = logging.getLogger(__name__)
+
+class RiskDiffer:
+    """Aligns each filing's risk section with the previous year's to find changed sentences.
+    
+    Filenames carry no issuer, so every risk file in the input directory is assumed
+    to come from the same company and is ordered by its fiscal year suffix.
+    """
+    
+    def __init__(self, reword_threshold: float = 0.6):
+        logger.info("Initializing RiskDiffer...")
+        # Download NLTK sentence tokenizer
+        nltk.download('punkt', quiet=True)
+        nltk.download('punkt_tab', quiet=True)
+        
+        # Minimum word-level similarity for a replaced sentence to count as reworded
+        self.reword_threshold = reword_threshold
+    
+    def _pair_rewordings(self, old: List[str], new: List[str]) -> dict:
+        """Pair unmatched sentences best-first whose word-level similarity passes the threshold."""
+        candidates = []
+        matcher = SequenceMatcher(autojunk=False)
+        for j, new_sentence in enumerate(new):
+            # SequenceMatcher caches details about seq2, so fix it per new sentence
+            matcher.set_seq2(new_sentence.lower().split())
+            for i, old_sentence in enumerate(old):
+                matcher.set_seq1(old_sentence.lower().split())
+                # Cheap upper bounds first, full ratio only if they can pass the threshold
+                if matcher.real_quick_ratio() < self.reword_threshold or matcher.quick_ratio() < self.reword_threshold:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= self.reword_threshold:
+                    candidates.append((ratio, i, j))
+        
+        # Take the most similar pairs first so a weaker match never claims a sentence
+        pairs = {}
+        used = set()
+        for ratio, i, j in sorted(candidates, key=lambda c: -c[0]):
+            if i in used or j in pairs:
+                continue
+            used.add(i)
+            pairs[j] = (i, ratio)
+        return pairs
+    
+    def _diff_sentences(self, previous: List[str], current: List[str]) -> List[dict]:
+        """Align two sentence lists by hash and classify each sentence."""
+        previous_hashes = [hash_sentence(s) for s in previous]
+        current_hashes = [hash_sentence(s) for s in current]
+        previous_set = set(previous_hashes)
+        current_set = set(current_hashes)
+        
+        # Sentences outside matching blocks are unchanged if they only moved within the section
+        results = []
+        old_idx, new_idx = [], []
+        matcher = SequenceMatcher(None, previous_hashes, current_hashes, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            for j in range(j1, j2):
+                if tag == 'equal' or current_hashes[j] in previous_set:
+                    results.append({'status': 'unchanged', 'sentence': current[j], 'previous_sentence': '', 'similarity': 1.0})
+                else:
+                    new_idx.append(j)
+            if tag != 'equal':
+                old_idx.extend(i for i in range(i1, i2) if previous_hashes[i] not in current_set)
+        
+        # Pair rewordings across the whole section, since a reworded sentence may also have moved
+        pairs = {}
+        if old_idx and new_idx:
+            pairs = self._pair_rewordings([previous[i] for i in old_idx], [current[j] for j in new_idx])
+        
+        paired_old = set()
+        for k, j in enumerate(new_idx):
+            if k in pairs:
+                old_k, ratio = pairs[k]
+                paired_old.add(old_k)
+                results.append({'status': 'reworded', 'sentence': current[j], 'previous_sentence': previous[old_idx[old_k]], 'similarity': ratio})
+            else:
+                results.append({'status': 'added', 'sentence': current[j], 'previous_sentence': '', 'similarity': 0.0})
+        for k, i in enumerate(old_idx):
+            if k not in paired_old:
+                results.append({'status': 'removed', 'sentence': previous[i], 'previous_sentence': '', 'similarity': 0.0})
+        
+        return results
+    
+    def diff_risks(self, input_dir: str, output_dir: str) -> None:
+        """Diff each risk section against the previous year's and save results to CSV."""
+        try:
+            logger.info(f"Starting year-over-year risk diff from {input_dir}")
+            
+            # Create output directory if it doesn't exist
+            os.makedirs(output_dir, exist_ok=True)
+            
+            # Order risk factor files by fiscal year
+            risk_files = list_risk_files(input_dir)
+            logger.info(f"Found {len(risk_files)} risk factor files to diff")
+            
+            summary = []
+            previous_file, previous_year, previous_sentences = None, None, []
+            for risk_file in tqdm(risk_files, desc="Diffing risk factors"):
+                year = extract_year_from_filename(risk_file)
+                # Amendments, undated files or a second issuer would be compared with an unrelated filing
+                if year is None:
+                    logger.warning(f"Skipping {risk_file}: no fiscal year in filename")
+                    continue
+                if previous_year is not None and year <= previous_year:
+                    logger.warning(f"Skipping {risk_file}: fiscal year {year} does not follow {previous_file} ({previous_year})")
+                    continue
+                
+                input_path = os.path.join(input_dir, risk_file)
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    sentences = split_sentences(f.read())
+                
+                # The earliest filing has nothing to compare against, so all of it is new
+                results = self._diff_sentences(previous_sentences, sentences)
+                df = pd.DataFrame(results, columns=['status', 'sentence', 'previous_sentence', 'similarity'])
+                counts = df['status'].value_counts()
+                
+                # Unchanged sentences are only counted in the summary to keep the diff small
+                df = df[df['status'] != 'unchanged'].copy()
+                df['file'] = risk_file
+                df['previous_file'] = previous_file or ''
+                output_path = os.path.join(output_dir, f"diff_{risk_file.replace('.txt', '.csv')}")
+                df.to_csv(output_path, index=False)
+                
+                summary.append({
+                    'file': risk_file,
+                    'year': year,
+                    'previous_file': previous_file or '',
+                    'previous_year': previous_year or '',
+                    'added': int(counts.get('added', 0)),
+                    'removed': int(counts.get('removed', 0)),
+                    'reworded': int(counts.get('reworded', 0)),
+                    'unchanged': int(counts.get('unchanged', 0))
+                })
+                logger.info(f"Saved risk diff for {risk_file} to {output_path}")
+                
+                previous_file, previous_year, previous_sentences = risk_file, year, sentences
+            
+            if summary:
+                output_path = os.path.join(output_dir, 'risk_diff_summary.csv')
+                pd.DataFrame(summary).to_csv(output_path, index=False)
+                logger.info(f"Saved risk diff summary to {output_path}")
+            else:
+                logger.warning("No risk factor files were available to diff")
+        
+        except Exception as e:
+            logger.error(f"Error in risk diff: {str(e)}", exc_info=True)
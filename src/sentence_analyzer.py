@@ -1,12 +1,11 @@
 import os
 import logging
-import re
 import torch
 import pandas as pd
 from tqdm import tqdm
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import nltk
-from nltk.tokenize import sent_tokenize
+from sentence_utils import clean_sentence, split_sentences, hash_sentence, list_risk_files
 
 logger = logging.getLogger(__name__)
 
@@ -38,20 +37,11 @@ class SentenceAnalyzer:
             logger.error(f"Error initializing FinBERT: {str(e)}")
             raise
     
-    def _clean_sentence(self, sentence: str) -> str:
-        """Clean and normalize a sentence for analysis."""
-        # Remove extra whitespace
-        sentence = re.sub(r'\s+', ' ', sentence.strip())
-        # Remove common document artifacts
-        sentence = re.sub(r'^\d+\.\s*', '', sentence)  # Remove leading numbers
-        sentence = re.sub(r'^[A-Z]\.\s*', '', sentence)  # Remove leading letters
-        return sentence
-    
     def _get_sentence_sentiment(self, sentence: str) -> dict:
         """Get sentiment score for a single sentence using FinBERT."""
         try:
             # Clean and prepare sentence
-            sentence = self._clean_sentence(sentence)
+            sentence = clean_sentence(sentence)
             if not sentence or len(sentence.split()) <= 3:
                 return None
             
@@ -79,7 +69,11 @@ class SentenceAnalyzer:
             return None
     
     def analyze_sentences(self, input_dir: str, output_dir: str) -> None:
-        """Analyze sentences in risk sections and save results to CSV."""
+        """Analyze sentences in risk sections and save results to CSV.
+        
+        Filings are processed oldest first and each wording is scored once, keyed by
+        hash_sentence, so a sentence RiskDiffer reports as unchanged is never rescored.
+        """
         try:
             logger.info(f"Starting sentence analysis from {input_dir}")
             
@@ -87,10 +81,11 @@ class SentenceAnalyzer:
             os.makedirs(output_dir, exist_ok=True)
             
             # Get all risk factor files
-            risk_files = [f for f in os.listdir(input_dir) if f.startswith('risk_') and f.endswith('.txt')]
+            # Process oldest filings first so unchanged sentences keep their original file
+            risk_files = list_risk_files(input_dir)
             logger.info(f"Found {len(risk_files)} risk factor files to analyze")
             
-            # Dictionary to store unique sentences and their analysis
+            # Dictionary to store unique sentences and their analysis, keyed by normalized hash
             unique_sentences = {}
             
             for risk_file in tqdm(risk_files, desc="Analyzing sentences"):
@@ -101,16 +96,16 @@ class SentenceAnalyzer:
                         text = f.read()
                     
                     # Split into sentences and clean
-                    sentences = [self._clean_sentence(s) for s in sent_tokenize(text)]
-                    sentences = [s for s in sentences if s and len(s.split()) > 3]  # Filter out short sentences
+                    sentences = split_sentences(text)
                     
-                    # Get sentiment scores for each sentence
+                    # Get sentiment scores for each sentence not seen in an earlier filing
                     for sentence in sentences:
-                        if sentence not in unique_sentences:
+                        sentence_hash = hash_sentence(sentence)
+                        if sentence_hash not in unique_sentences:
                             score = self._get_sentence_sentiment(sentence)
                             if score:
                                 score['file'] = risk_file
-                                unique_sentences[sentence] = score
+                                unique_sentences[sentence_hash] = score
                         
                 except Exception as e:
                     logger.error(f"Error processing file {risk_file}: {str(e)}")
@@ -0,0 +1,40 @@
+import os
+import re
+import hashlib
+from typing import List, Optional
+from nltk.tokenize import sent_tokenize
+
+def clean_sentence(sentence: str) -> str:
+    """Clean and normalize a sentence for analysis."""
+    # Remove extra whitespace
+    sentence = re.sub(r'\s+', ' ', sentence.strip())
+    # Remove common document artifacts
+    sentence = re.sub(r'^\d+\.\s*', '', sentence)  # Remove leading numbers
+    sentence = re.sub(r'^[A-Z]\.\s*', '', sentence)  # Remove leading letters
+    return sentence
+
+def split_sentences(text: str) -> List[str]:
+    """Split a risk section into cleaned sentences, dropping short fragments."""
+    sentences = [clean_sentence(s) for s in sent_tokenize(text)]
+    return [s for s in sentences if s and len(s.split()) > 3]  # Filter out short sentences
+
+def hash_sentence(sentence: str) -> str:
+    """Hash a sentence ignoring case, punctuation and spacing."""
+    normalized = ' '.join(re.findall(r'[a-z0-9]+', sentence.lower()))
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def extract_year_from_filename(filename: str) -> Optional[int]:
+    """Extract a year from a filename, preferring a trailing _<year> suffix."""
+    year_match = re.search(r'_((?:19|20)\d{2})\.[^.]+$', filename)
+    if not year_match:
+        year_match = re.search(r'(20\d{2})', filename)
+    if year_match:
+        return int(year_match.group(1))
+    return None
+
+def list_risk_files(input_dir: str) -> List[str]:
+    """List risk factor files ordered by fiscal year, oldest first."""
+    risk_files = [f for f in os.listdir(input_dir) if f.startswith('risk_') and f.endswith('.txt')]
+    # Files without a year sort first so they never sit between two dated filings
+    risk_files.sort(key=lambda f: (extract_year_from_filename(f) or 0, f))
+    return risk_files
@@ -0,0 +1,242 @@
+import os
+import glob
+import logging
+import hashlib
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+from sentence_transformers import SentenceTransformer
+from sklearn.cluster import MiniBatchKMeans, kmeans_plusplus
+
+logger = logging.getLogger(__name__)
+
+class ThemeClusterer:
+    """Groups risk sentences into themes using sentence embeddings.
+    
+    Sentences are streamed from the FinBERT summary in chunks, so memory use is
+    bounded by chunk_size x embedding dimension plus a few bytes per sentence.
+    Embeddings are cached on disk by sentence hash and memory-mapped on reuse.
+    """
+    
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", n_themes: int = 10,
+                 chunk_size: int = 8192, batch_size: int = 256, n_examples: int = 3,
+                 n_epochs: int = 3, cache_dir: str = os.path.join("models", "embedding_cache")):
+        logger.info(f"Initializing ThemeClusterer with {model_name}...")
+        try:
+            self.model = SentenceTransformer(model_name, cache_folder="models")
+            self.embedding_dim = self.model.get_sentence_embedding_dimension()
+            
+            self.n_themes = n_themes
+            self.chunk_size = chunk_size
+            self.batch_size = batch_size
+            self.n_examples = n_examples
+            self.n_epochs = n_epochs
+            
+            # Keep one cache per model so embedding dimensions never mix
+            self.cache_dir = os.path.join(cache_dir, model_name.replace('/', '_'))
+            os.makedirs(self.cache_dir, exist_ok=True)
+            logger.info("Sentence embedding model loaded successfully")
+        
+        except Exception as e:
+            logger.error(f"Error initializing ThemeClusterer: {str(e)}")
+            raise
+    
+    def _hash_sentences(self, sentences) -> np.ndarray:
+        """Hash sentences to 64-bit keys for the embedding cache."""
+        return np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+             for s in sentences],
+            dtype=np.uint64
+        )
+    
+    def _read_chunks(self, summary_path: str):
+        """Stream the sentence summary CSV in fixed-size chunks."""
+        return pd.read_csv(summary_path, chunksize=self.chunk_size, keep_default_na=False)
+    
+    def _load_cache(self) -> tuple:
+        """Load the on-disk cache index and memory-map its embedding shards."""
+        shards, keys, shard_ids, rows = [], [], [], []
+        # A shard only counts once its hash file exists, which is written last
+        for hashes_path in sorted(glob.glob(os.path.join(self.cache_dir, 'hashes_*.npy'))):
+            embeddings_path = hashes_path.replace('hashes_', 'embeddings_')
+            if not os.path.exists(embeddings_path):
+                continue
+            hashes = np.load(hashes_path)
+            shard_ids.append(np.full(len(hashes), len(shards), dtype=np.int32))
+            rows.append(np.arange(len(hashes), dtype=np.int64))
+            keys.append(hashes)
+            shards.append(np.load(embeddings_path, mmap_mode='r'))
+        
+        if not keys:
+            return shards, np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        
+        keys = np.concatenate(keys)
+        order = np.argsort(keys, kind='stable')
+        return shards, keys[order], np.concatenate(shard_ids)[order], np.concatenate(rows)[order]
+    
+    def _update_cache(self, summary_path: str, hashes: np.ndarray) -> None:
+        """Encode sentences missing from the cache and store them as a new shard."""
+        _, cached_keys, _, _ = self._load_cache()
+        missing = np.setdiff1d(hashes, cached_keys)
+        if len(missing) == 0:
+            logger.info("All sentence embeddings found in cache")
+            return
+        
+        logger.info(f"Encoding {len(missing)} sentences not found in cache")
+        shard_name = f"{len(glob.glob(os.path.join(self.cache_dir, 'hashes_*.npy'))):05d}"
+        embeddings_path = os.path.join(self.cache_dir, f"embeddings_{shard_name}.npy")
+        hashes_path = os.path.join(self.cache_dir, f"hashes_{shard_name}.npy")
+        
+        embeddings = np.lib.format.open_memmap(
+            embeddings_path, mode='w+', dtype=np.float32, shape=(len(missing), self.embedding_dim)
+        )
+        shard_hashes = np.empty(len(missing), dtype=np.uint64)
+        written = np.zeros(len(missing), dtype=bool)
+        n_written = 0
+        
+        offset = 0
+        for chunk in tqdm(self._read_chunks(summary_path), desc="Encoding sentences"):
+            chunk_hashes = hashes[offset:offset + len(chunk)]
+            offset += len(chunk)
+            
+            # Select sentences that are missing and not yet encoded in this run
+            pos = np.minimum(np.searchsorted(missing, chunk_hashes), len(missing) - 1)
+            todo = (missing[pos] == chunk_hashes) & ~written[pos]
+            todo_idx = np.flatnonzero(todo)
+            _, first = np.unique(pos[todo_idx], return_index=True)
+            todo_idx = todo_idx[first]
+            if len(todo_idx) == 0:
+                continue
+            
+            sentences = chunk['sentence'].iloc[todo_idx].astype(str).tolist()
+            end = n_written + len(sentences)
+            embeddings[n_written:end] = self.model.encode(
+                sentences, batch_size=self.batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            )
+            shard_hashes[n_written:end] = chunk_hashes[todo_idx]
+            written[pos[todo_idx]] = True
+            n_written = end
+        
+        embeddings.flush()
+        del embeddings
+        np.save(hashes_path, shard_hashes[:n_written])
+        logger.info(f"Saved {n_written} embeddings to cache shard {shard_name}")
+    
+    def _iter_embeddings(self, hashes: np.ndarray, cache: tuple):
+        """Yield (offset, embeddings) chunks gathered from the memory-mapped cache."""
+        shards, keys, shard_ids, rows = cache
+        for start in range(0, len(hashes), self.chunk_size):
+            chunk_hashes = hashes[start:start + self.chunk_size]
+            pos = np.searchsorted(keys, chunk_hashes)
+            chunk_shards, chunk_rows = shard_ids[pos], rows[pos]
+            
+            embeddings = np.empty((len(chunk_hashes), self.embedding_dim), dtype=np.float32)
+            for shard_id in np.unique(chunk_shards):
+                mask = chunk_shards == shard_id
+                embeddings[mask] = shards[shard_id][chunk_rows[mask]]
+            yield start, embeddings
+    
+    def _fit_centroids(self, hashes: np.ndarray, cache: tuple, n_themes: int) -> np.ndarray:
+        """Fit theme centroids with mini-batch k-means over embedding chunks."""
+        rng = np.random.default_rng(42)
+        
+        # The summary is sorted by negativity, so seed k-means++ from rows sampled across the whole file
+        sample = np.sort(rng.choice(len(hashes), size=min(len(hashes), self.chunk_size), replace=False))
+        sample_embeddings = np.concatenate([e for _, e in self._iter_embeddings(hashes[sample], cache)])
+        init, _ = kmeans_plusplus(sample_embeddings, n_clusters=n_themes, random_state=42)
+        
+        kmeans = MiniBatchKMeans(n_clusters=n_themes, init=init, random_state=42)
+        for _ in range(self.n_epochs):
+            # Reshuffle every epoch so each mini-batch is a random draw from the corpus
+            order = rng.permutation(len(hashes))
+            for _, embeddings in self._iter_embeddings(hashes[order], cache):
+                kmeans.partial_fit(embeddings)
+        
+        # Normalize so a dot product against unit embeddings is cosine similarity
+        centroids = kmeans.cluster_centers_.astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        return centroids / np.maximum(norms, 1e-12)
+    
+    def _assign_themes(self, hashes: np.ndarray, cache: tuple, centroids: np.ndarray) -> tuple:
+        """Assign each sentence to its most similar centroid, one chunk at a time."""
+        labels = np.empty(len(hashes), dtype=np.int32)
+        similarities = np.empty(len(hashes), dtype=np.float32)
+        for start, embeddings in self._iter_embeddings(hashes, cache):
+            # Only a chunk_size x n_themes similarity block is ever materialized
+            sims = embeddings @ centroids.T
+            end = start + len(embeddings)
+            labels[start:end] = np.argmax(sims, axis=1)
+            similarities[start:end] = sims[np.arange(len(embeddings)), labels[start:end]]
+        return labels, similarities
+    
+    def cluster_themes(self, analysis_dir: str) -> None:
+        """Cluster risk sentences into themes and save theme summaries to CSV."""
+        try:
+            summary_path = os.path.join(analysis_dir, 'sentence_sentiment_summary.csv')
+            if not os.path.exists(summary_path):
+                logger.warning(f"No sentence sentiment summary found at {summary_path}")
+                return
+            
+            logger.info(f"Starting theme clustering from {summary_path}")
+            
+            # Hash sentences and record negativity without holding the text in memory
+            hashes, negativity = [], []
+            for chunk in self._read_chunks(summary_path):
+                hashes.append(self._hash_sentences(chunk['sentence'].astype(str)))
+                negativity.append(np.where(chunk['label'] == 'negative', chunk['score'], 0.0).astype(np.float32))
+            
+            if not hashes or sum(len(h) for h in hashes) == 0:
+                logger.warning("No sentences available for theme clustering")
+                return
+            
+            hashes = np.concatenate(hashes)
+            negativity = np.concatenate(negativity)
+            logger.info(f"Found {len(hashes)} sentences to cluster")
+            
+            self._update_cache(summary_path, hashes)
+            cache = self._load_cache()
+            
+            n_themes = min(self.n_themes, len(np.unique(hashes)))
+            centroids = self._fit_centroids(hashes, cache, n_themes)
+            labels, similarities = self._assign_themes(hashes, cache, centroids)
+            
+            sizes = np.bincount(labels, minlength=n_themes)
+            avg_negativity = np.bincount(labels, weights=negativity, minlength=n_themes) / np.maximum(sizes, 1)
+            
+            # Use the sentences closest to each centroid as its examples
+            example_idx = {}
+            for theme in range(n_themes):
+                members = np.flatnonzero(labels == theme)
+                top = members[np.argsort(-similarities[members])[:self.n_examples]]
+                for rank, idx in enumerate(top):
+                    example_idx[int(idx)] = (theme, rank)
+            
+            # Second pass over the CSV to fetch example text and write assignments
+            examples = {theme: [''] * min(self.n_examples, int(sizes[theme])) for theme in range(n_themes)}
+            assignments_path = os.path.join(analysis_dir, 'sentence_themes.csv')
+            offset = 0
+            for chunk in self._read_chunks(summary_path):
+                end = offset + len(chunk)
+                for idx in [i for i in example_idx if offset <= i < end]:
+                    theme, rank = example_idx[idx]
+                    examples[theme][rank] = chunk['sentence'].iloc[idx - offset]
+                
+                chunk = chunk.assign(theme=labels[offset:end] + 1, similarity=similarities[offset:end])
+                chunk.to_csv(assignments_path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+                offset = end
+            logger.info(f"Saved sentence theme assignments to {assignments_path}")
+            
+            themes = pd.DataFrame({
+                'theme': np.arange(n_themes) + 1,
+                'size': sizes,
+                'avg_negativity': avg_negativity,
+                'examples': [' || '.join(examples[theme]) for theme in range(n_themes)]
+            })
+            themes = themes[themes['size'] > 0].sort_values('size', ascending=False)
+            output_path = os.path.join(analysis_dir, 'risk_themes.csv')
+            themes.to_csv(output_path, index=False)
+            logger.info(f"Saved {len(themes)} risk themes to {output_path}")
+        
+        except Exception as e:
+            logger.error(f"Error in theme clustering: {str(e)}", exc_info=True)